@@ -14,13 +14,26 @@ university assignments.
 
 from __future__ import annotations
 
-from datetime import datetime, timedelta
-from typing import Iterable, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import chain
+from typing import Iterable, Iterator, List, Sequence, Tuple
+import contextlib
+import hashlib
+import json
 import os
+import tempfile
 
 import numpy as np
 import pandas as pd
 
+try:
+    # pyarrow ships with the BigQuery Storage extras and is only needed when
+    # results are actually downloaded.
+    import pyarrow
+except ImportError:  # pragma: no cover
+    pyarrow = None  # type: ignore
+
 try:
     # Import BigQuery only if available.  This allows the module to be
     # imported on systems without GCP credentials for testing or linting.
@@ -28,8 +41,45 @@ try:
 except ImportError:  # pragma: no cover
     bigquery = None  # type: ignore
 
+try:
+    # The Storage Read API client is optional; without it streamed results
+    # fall back to the slower REST pagination.
+    from google.cloud import bigquery_storage
+except ImportError:  # pragma: no cover
+    bigquery_storage = None  # type: ignore
+
+
+#: Local directory used to cache the ``d_labitems`` lookup between runs.
+ITEMS_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'acidosis')
+
+#: Lactate (mmol/L) above which a reading counts as abnormal.
+LACTATE_THRESHOLD = 4.0
+
+#: Arterial pH at or below which a reading counts as abnormal.
+PH_THRESHOLD = 7.35
+
+#: Lower‑cased ``emar.medication`` names treated as vasoactive therapy.
+VASOACTIVE_MEDICATIONS = [
+    'dopamine', 'milrinone', 'vasopressin', 'nitroglycerin', 'nitroprusside',
+    'epinephrine', 'norepinephrine', 'levophed', 'dobutamine', 'hydralazine',
+    'labetalol', 'methylene blue', 'terlipressin', 'angiotensin ii',
+]
+
+
+def _require_bigquery() -> None:
+    """Raise a helpful error if the BigQuery client library is missing."""
+    if bigquery is None:
+        raise RuntimeError(
+            "google‑cloud‑bigquery is not installed. Please install it with"
+            " `pip install google‑cloud‑bigquery` and authenticate with GCP."
+        )
+
 
-def run_query(client: bigquery.Client, query: str) -> pd.DataFrame:
+def run_query(
+    client: bigquery.Client,
+    query: str,
+    job_config: bigquery.QueryJobConfig | None = None,
+) -> pd.DataFrame:
     """Execute a SQL query and return the results as a DataFrame.
 
     Parameters
@@ -38,6 +88,9 @@ def run_query(client: bigquery.Client, query: str) -> pd.DataFrame:
         An authenticated BigQuery client instance.
     query : str
         A SQL query string to execute.
+    job_config : bigquery.QueryJobConfig, optional
+        Job configuration, typically carrying the query parameters
+        referenced by ``query``.
 
     Returns
     -------
@@ -49,82 +102,353 @@ def run_query(client: bigquery.Client, query: str) -> pd.DataFrame:
     RuntimeError
         If the BigQuery client library is not installed.
     """
-    if bigquery is None:
-        raise RuntimeError(
-            "google‑cloud‑bigquery is not installed. Please install it with"
-            " `pip install google‑cloud‑bigquery` and authenticate with GCP."
-        )
-    job = client.query(query)
-    return job.result().to_dataframe()
+    _require_bigquery()
+    job = client.query(query, job_config=job_config)
+    # Download through the BigQuery Storage Read API (Arrow over gRPC),
+    # which is much faster than paging JSON rows for large result sets.
+    return job.result().to_dataframe(create_bqstorage_client=True)
+
+
+def run_query_iter(
+    client: bigquery.Client,
+    query: str,
+    job_config: bigquery.QueryJobConfig | None = None,
+) -> Iterator[pyarrow.RecordBatch]:
+    """Execute a SQL query and stream the results as Arrow record batches.
+
+    Unlike :func:`run_query`, the full result set is never held in memory at
+    once, so callers can reduce each batch before the next one arrives.
+    When ``google-cloud-bigquery-storage`` is installed the batches are read
+    through the Storage Read API with the credentials of ``client``; the
+    read client is closed once the iterator is exhausted or discarded.
+
+    Parameters
+    ----------
+    client : bigquery.Client
+        An authenticated BigQuery client instance.
+    query : str
+        A SQL query string to execute.
+    job_config : bigquery.QueryJobConfig, optional
+        Job configuration, typically carrying the query parameters
+        referenced by ``query``.
+
+    Returns
+    -------
+    iterator of pyarrow.RecordBatch
+        The query results, one batch at a time.
+
+    Raises
+    ------
+    RuntimeError
+        If the BigQuery client library is not installed.
+    """
+    _require_bigquery()
+    rows = client.query(query, job_config=job_config).result()
+    return _iter_arrow_batches(client, rows)
+
+
+def _iter_arrow_batches(
+    client: bigquery.Client,
+    rows: bigquery.table.RowIterator,
+) -> Iterator[pyarrow.RecordBatch]:
+    """Yield the record batches of ``rows``, owning the Storage API client."""
+    if bigquery_storage is None:
+        yield from rows.to_arrow_iterable()
+        return
+    # Mirror google-cloud-bigquery 3.x, whose Client._ensure_bqstorage_client
+    # builds the read client from the private ``_credentials`` attribute, so
+    # explicitly authenticated clients keep working.  If a future release
+    # drops the attribute, fall back to application default credentials.
+    with bigquery_storage.BigQueryReadClient(
+        credentials=getattr(client, '_credentials', None),
+    ) as bqstorage_client:
+        yield from rows.to_arrow_iterable(bqstorage_client=bqstorage_client)
 
 
-def get_lactate_ph_items(client: bigquery.Client) -> Tuple[List[int], List[int]]:
+def get_lactate_ph_items(
+    client: bigquery.Client,
+    cache_dir: str | None = ITEMS_CACHE_DIR,
+) -> Tuple[List[int], List[int]]:
     """Retrieve item identifiers for lactate and arterial pH measurements.
 
     The MIMIC‑IV database stores laboratory item metadata in
-    ``physionet-data.mimiciv_hosp.d_labitems``.  This function returns two
+    ``physionet-data.mimiciv_hosp.d_labitems``.  Both item groups are
+    categorised in a single scan of that table.  This function returns two
     lists of item identifiers: one for lactate and one for arterial pH.
+
+    ``d_labitems`` is effectively static, so the result is stored as JSON in
+    ``cache_dir`` under a key derived from the query text and reused on later
+    calls without contacting BigQuery.  Pass ``cache_dir=None`` to always
+    query.
     """
-    lactate_query = """
-        SELECT itemid
+    query = """
+        SELECT
+            itemid,
+            LOWER(label) LIKE '%lactate%' AS is_lactate,
+            LOWER(label) LIKE '%ph%' AND LOWER(category) LIKE '%blood%' AS is_ph
         FROM `physionet-data.mimiciv_hosp.d_labitems`
         WHERE LOWER(label) LIKE '%lactate%'
+           OR (LOWER(label) LIKE '%ph%' AND LOWER(category) LIKE '%blood%')
     """
-    ph_query = """
-        SELECT itemid
-        FROM `physionet-data.mimiciv_hosp.d_labitems`
-        WHERE LOWER(label) LIKE '%ph%' AND LOWER(category) LIKE '%blood%'
+    cache_path = None
+    if cache_dir is not None:
+        key = hashlib.sha256(query.encode('utf-8')).hexdigest()[:16]
+        cache_path = os.path.join(cache_dir, f'labitems-{key}.json')
+        try:
+            with open(cache_path) as fh:
+                cached = json.load(fh)
+            lactate_items, ph_items = cached['lactate'], cached['ph']
+        except (OSError, ValueError, KeyError, TypeError):
+            # A missing, unreadable, truncated or foreign file is a cache
+            # miss; it is rewritten below.
+            pass
+        else:
+            if _is_id_list(lactate_items) and _is_id_list(ph_items):
+                return lactate_items, ph_items
+
+    items_df = run_query(client, query)
+    is_lactate = items_df['is_lactate'].fillna(False).astype(bool)
+    is_ph = items_df['is_ph'].fillna(False).astype(bool)
+    lactate_items = [int(i) for i in items_df.loc[is_lactate, 'itemid']]
+    ph_items = [int(i) for i in items_df.loc[is_ph, 'itemid']]
+    if cache_path is not None:
+        # The cache is best effort: an unwritable directory must not fail a
+        # lookup that has already succeeded.
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Write to a temporary file and rename it into place so an
+            # interrupted run never leaves a truncated cache behind.
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as fh:
+                    json.dump({'lactate': lactate_items, 'ph': ph_items}, fh)
+                os.replace(tmp_path, cache_path)
+            except BaseException:
+                with contextlib.suppress(OSError):
+                    os.unlink(tmp_path)
+                raise
+        except OSError:
+            pass
+    return lactate_items, ph_items
+
+
+def _is_id_list(value: object) -> bool:
+    """Return whether ``value`` is a list of integer identifiers."""
+    return isinstance(value, list) and all(
+        isinstance(i, int) and not isinstance(i, bool) for i in value
+    )
+
+
+def _query_config(
+    parameters: Sequence[bigquery.ScalarQueryParameter | bigquery.ArrayQueryParameter],
+) -> bigquery.QueryJobConfig:
+    """Build a job configuration for a parameterised, cacheable query.
+
+    Keeping values out of the SQL text means identical query strings are
+    submitted on every run, so BigQuery can answer repeats from its
+    results cache.
+    """
+    return bigquery.QueryJobConfig(
+        query_parameters=list(parameters), use_query_cache=True,
+    )
+
+
+def _ensure_cache_table(
+    client: bigquery.Client,
+    table_id: str,
+    select_query: str,
+    table_options: str = '',
+) -> str:
+    """Materialise ``select_query`` into a cache table and return its id.
+
+    The table is named ``table_id`` suffixed with a short hash of
+    ``select_query`` and ``table_options``, so a change in what the cache
+    should hold (e.g. a different item set) selects a new table instead of
+    silently reusing a stale one.  ``table_options`` is inserted verbatim
+    between the table name and ``AS`` and may carry ``PARTITION BY`` /
+    ``CLUSTER BY`` clauses.  An existing table is left untouched; drop it to
+    refresh the cache.
+    """
+    definition = ' '.join(f'{table_options} {select_query}'.split())
+    key = hashlib.sha256(definition.encode('utf-8')).hexdigest()[:12]
+    cached_id = f'{table_id}_{key}'
+    ddl = f"""
+        CREATE TABLE IF NOT EXISTS `{cached_id}`
+        {table_options}
+        AS {select_query}
+    """
+    client.query(ddl).result()
+    return cached_id
+
+
+def _lab_events_source(
+    client: bigquery.Client,
+    items: Sequence[int],
+    cache_table: str | None,
+) -> str:
+    """Return the table expression to read lactate/pH lab events from.
+
+    Without ``cache_table`` this is ``labevents`` itself; otherwise the
+    relevant slice is cached first (see :func:`fetch_lab_events`) and the
+    cached table is returned.
     """
-    lactate_df = run_query(client, lactate_query)
-    ph_df = run_query(client, ph_query)
-    return lactate_df["itemid"].tolist(), ph_df["itemid"].tolist()
+    source = '`physionet-data.mimiciv_hosp.labevents`'
+    if cache_table is None:
+        return source
+    # The identifiers are plain integers, so inlining them in the
+    # one‑off CREATE TABLE statement is safe.
+    items_str = ",".join(str(i) for i in items)
+    cached_id = _ensure_cache_table(
+        client,
+        cache_table,
+        f"""
+        SELECT labevent_id, subject_id, hadm_id, charttime, itemid, valuenum
+        FROM {source}
+        WHERE itemid IN ({items_str})
+          AND valuenum IS NOT NULL
+        """,
+        'PARTITION BY DATETIME_TRUNC(charttime, MONTH) '
+        'CLUSTER BY subject_id, itemid',
+    )
+    return f'`{cached_id}`'
 
 
 def fetch_lab_events(
     client: bigquery.Client,
     lactate_items: Iterable[int],
     ph_items: Iterable[int],
+    cache_table: str | None = None,
 ) -> pd.DataFrame:
     """Fetch lactate and arterial pH laboratory events from MIMIC‑IV.
 
-    The returned DataFrame contains ``subject_id``, ``hadm_id``, ``charttime``,
-    ``itemid`` and a ``measure_value`` column (renamed from ``valuenum``).
+    The returned DataFrame contains ``labevent_id``, ``subject_id``,
+    ``hadm_id``, ``charttime``, ``itemid`` and a ``measure_value`` column
+    (renamed from ``valuenum``).  Subject, admission and item identifiers are
+    stored as 32‑bit integers, ``itemid`` as a categorical and
+    ``measure_value`` as ``float32``.
+
+    If ``cache_table`` (a fully qualified ``project.dataset.table`` id) is
+    given, the lactate/pH slice of ``labevents`` is copied on first use into
+    a table of that name suffixed with a hash of the item set, partitioned
+    by month of ``charttime`` and clustered by ``subject_id`` and
+    ``itemid``.  Subsequent calls with the same items read the small cached
+    table instead of rescanning ``labevents``.
     """
-    items_str = ",".join(str(i) for i in set(list(lactate_items) + list(ph_items)))
+    # Sorting keeps the parameter value, and therefore BigQuery's cache key,
+    # identical for the same item set.
+    items = sorted(int(i) for i in set(chain(lactate_items, ph_items)))
+    source = _lab_events_source(client, items, cache_table)
     query = f"""
         SELECT
+            le.labevent_id,
             le.subject_id,
             le.hadm_id,
             le.charttime,
             le.itemid,
             le.valuenum AS measure_value
-        FROM `physionet-data.mimiciv_hosp.labevents` le
-        WHERE le.itemid IN ({items_str})
+        FROM {source} le
+        WHERE le.itemid IN UNNEST(@items)
           AND le.valuenum IS NOT NULL
     """
-    return run_query(client, query)
+    job_config = _query_config([
+        bigquery.ArrayQueryParameter('items', 'INT64', items),
+    ])
+    # Narrow each Arrow batch as it arrives so only the downcast columns are
+    # retained, then convert to pandas once at the end, releasing the Arrow
+    # buffers as they are converted.  MIMIC identifiers fit comfortably in
+    # 32 bits and there are only a handful of distinct lactate/pH item ids.
+    # Normal readings cannot be dropped here because they close abnormal
+    # episodes.
+    narrow_types = {
+        'labevent_id': pyarrow.int64(),
+        'subject_id': pyarrow.int32(),
+        'hadm_id': pyarrow.int32(),
+        'itemid': pyarrow.int32(),
+        'measure_value': pyarrow.float32(),
+    }
+    tables = []
+    for batch in run_query_iter(client, query, job_config):
+        schema = pyarrow.schema([
+            pyarrow.field(field.name, narrow_types.get(field.name, field.type))
+            for field in batch.schema
+        ])
+        tables.append(pyarrow.Table.from_batches([batch]).cast(schema))
+    if tables:
+        table = pyarrow.concat_tables(tables)
+        del tables
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+        del table
+    else:
+        df = pd.DataFrame(
+            columns=['labevent_id', 'subject_id', 'hadm_id', 'charttime', 'itemid',
+                     'measure_value'],
+        ).astype({
+            'labevent_id': 'int64',
+            'subject_id': 'int32',
+            'itemid': 'int32',
+            'measure_value': 'float32',
+        })
+    # Arrow converts an int32 column with nulls to float64.
+    df['hadm_id'] = df['hadm_id'].astype('Int32')
+    df['itemid'] = df['itemid'].astype('category')
+    return df
 
 
-def fetch_vasoactive_drugs(client: bigquery.Client) -> pd.DataFrame:
+def fetch_vasoactive_drugs(
+    client: bigquery.Client,
+    cache_table: str | None = None,
+) -> pd.DataFrame:
     """Retrieve administration times for common vasoactive medications.
 
     Vasoactive drugs are extracted from the
     ``physionet-data.mimiciv_hosp.emar`` table by filtering on a curated
     list of medication names.  Only administration records with a known
     schedule time are returned.
+
+    If ``cache_table`` is given, the vasoactive slice of ``emar`` is copied
+    on first use into a table of that name suffixed with a hash of
+    :data:`VASOACTIVE_MEDICATIONS`, together with a precomputed
+    ``medication_lower`` column, clustered on it.  Later calls filter the
+    small cached table on that column directly instead of evaluating
+    ``LOWER(medication)`` over every ``emar`` row.
     """
-    medications = [
-        'dopamine', 'milrinone', 'vasopressin', 'nitroglycerin', 'nitroprusside',
-        'epinephrine', 'norepinephrine', 'levophed', 'dobutamine', 'hydralazine',
-        'labetalol', 'methylene blue', 'terlipressin', 'angiotensin ii',
-    ]
-    meds_str = ",".join(f"'{m}'" for m in medications)
-    query = f"""
-        SELECT subject_id, medication, scheduletime
-        FROM `physionet-data.mimiciv_hosp.emar`
-        WHERE LOWER(medication) IN ({meds_str})
-    """
-    return run_query(client, query)
+    if cache_table is not None:
+        # The medication names are module constants, so inlining them in
+        # the one‑off CREATE TABLE statement is safe.  Sorting them keeps the
+        # cache table name stable when the list is merely reordered.
+        meds_str = ",".join(f"'{m}'" for m in sorted(VASOACTIVE_MEDICATIONS))
+        cached_id = _ensure_cache_table(
+            client,
+            cache_table,
+            f"""
+            SELECT
+                subject_id,
+                medication,
+                LOWER(medication) AS medication_lower,
+                scheduletime
+            FROM `physionet-data.mimiciv_hosp.emar`
+            WHERE LOWER(medication) IN ({meds_str})
+            """,
+            'CLUSTER BY medication_lower, subject_id',
+        )
+        query = f"""
+            SELECT subject_id, medication, scheduletime
+            FROM `{cached_id}`
+            WHERE medication_lower IN UNNEST(@meds)
+        """
+    else:
+        query = """
+            SELECT subject_id, medication, scheduletime
+            FROM `physionet-data.mimiciv_hosp.emar`
+            WHERE LOWER(medication) IN UNNEST(@meds)
+        """
+    job_config = _query_config([
+        bigquery.ArrayQueryParameter('meds', 'STRING', VASOACTIVE_MEDICATIONS),
+    ])
+    drugs = run_query(client, query, job_config)
+    # Only a few distinct medication names occur, so store them as codes.
+    drugs['medication'] = drugs['medication'].astype('category')
+    return drugs
 
 
 def identify_acidosis_episodes(
@@ -136,44 +460,186 @@ def identify_acidosis_episodes(
 ) -> List[int]:
     """Identify subjects with prolonged lactic or metabolic acidosis episodes.
 
-    The lab events are grouped by subject.  Each subject's events are
-    sorted chronologically and contiguous periods of abnormal values are
-    detected.  An abnormal value is defined as lactate > 4.0 mmol/L or
-    arterial pH ≤ 7.35.  If an abnormal episode lasts at least ``min_duration``
-    and the patient receives at least one vasoactive drug during that
-    interval, the subject is added to the output list.
-    """
-    candidates: List[int] = []
-    for subject_id, data in bp.groupby('subject_id'):
-        data = data.sort_values('charttime').reset_index(drop=True)
-        episodes: List[Tuple[datetime, datetime]] = []
-        start: datetime | None = None
-        for _, record in data.iterrows():
-            itemid = record['itemid']
-            value = record['measure_value']
-            is_abnormal = (
-                (itemid in lactate_items and value > 4.0) or
-                (itemid in ph_items and value <= 7.35)
-            )
-            if is_abnormal:
-                if start is None:
-                    start = record['charttime']
-            else:
-                if start is not None:
-                    end = record['charttime']
-                    if end - start >= min_duration:
-                        episodes.append((start, end))
-                    start = None
-        subject_drugs = vadrugs[vadrugs['subject_id'] == subject_id]
-        for start, end in episodes:
-            meds_in_window = subject_drugs[
-                (subject_drugs['scheduletime'] > start) &
-                (subject_drugs['scheduletime'] < end)
-            ]
-            if not meds_in_window.empty:
-                candidates.append(subject_id)
-                break
-    return candidates
+    ``bp`` needs ``subject_id``, ``charttime``, ``itemid`` and
+    ``measure_value`` columns, as returned by :func:`fetch_lab_events`.  The
+    lab events are sorted chronologically per subject and contiguous periods
+    of abnormal values are detected.  Readings that share a charttime are
+    ordered by ``labevent_id`` when that column is present, and otherwise
+    keep their input order.  An abnormal value is defined
+    as lactate > 4.0 mmol/L or arterial pH ≤ 7.35.  An episode starts at the
+    first abnormal value of a run and ends at the next normal value; runs
+    that are still open at a subject's last measurement are discarded.  If an
+    abnormal episode lasts at least ``min_duration`` and the patient receives
+    at least one vasoactive drug during that interval, the subject is added
+    to the output list.
+
+    The detection is fully vectorised: run boundaries are found by comparing
+    each row with its predecessor rather than by iterating over rows.
+
+    :func:`query_acidosis_subjects` implements the same phenotype in SQL:
+    the thresholds (:data:`LACTATE_THRESHOLD`, :data:`PH_THRESHOLD`), the
+    ``labevent_id`` tie order and the rule that a run closes at the next
+    normal reading must be changed in both places together.
+    """
+    # Materialise the item identifiers once; callers may pass lists or
+    # one-shot iterables.
+    lactate_items = frozenset(lactate_items)
+    ph_items = frozenset(ph_items)
+
+    # A single sort orders every subject's measurements.  Lactate and pH
+    # from one blood gas share a charttime and BigQuery returns rows in no
+    # fixed order, so labevent_id breaks ties as in query_acidosis_subjects.
+    if 'labevent_id' in bp.columns:
+        bp = bp.sort_values(['subject_id', 'charttime', 'labevent_id'])
+    else:
+        bp = bp.sort_values(['subject_id', 'charttime'], kind='stable')
+    subject = bp['subject_id']
+    is_abnormal = (
+        (bp['itemid'].isin(lactate_items) & (bp['measure_value'] > LACTATE_THRESHOLD)) |
+        (bp['itemid'].isin(ph_items) & (bp['measure_value'] <= PH_THRESHOLD))
+    )
+    # A new run begins wherever the abnormal flag or the subject changes.
+    run_start = (is_abnormal != is_abnormal.shift()) | (subject != subject.shift())
+    runs = pd.DataFrame({
+        'subject_id': subject[run_start],
+        'start': bp['charttime'][run_start],
+        'is_abnormal': is_abnormal[run_start],
+    })
+    # An abnormal run ends where the following (normal) run of the same
+    # subject begins.
+    next_subject = runs['subject_id'].shift(-1)
+    runs['end'] = runs['start'].shift(-1).where(next_subject == runs['subject_id'])
+    episodes = runs[
+        runs['is_abnormal'] &
+        runs['end'].notna() &
+        (runs['end'] - runs['start'] >= min_duration)
+    ]
+    if episodes.empty:
+        return []
+
+    # Episodes of a subject never overlap, so each drug administration can
+    # only fall inside the latest episode that started strictly before it.
+    # merge_asof requires identical key dtypes on both sides.
+    episodes = episodes[['subject_id', 'start', 'end']].astype({'subject_id': 'int64'})
+    drugs = vadrugs[['subject_id', 'scheduletime']].dropna().astype({
+        'subject_id': 'int64',
+        'scheduletime': episodes['start'].dtype,
+    })
+    merged = pd.merge_asof(
+        drugs.sort_values('scheduletime'),
+        episodes.sort_values('start'),
+        left_on='scheduletime',
+        right_on='start',
+        by='subject_id',
+        direction='backward',
+        allow_exact_matches=False,
+    )
+    in_window = merged[merged['scheduletime'] < merged['end']]
+    return np.unique(in_window['subject_id'].to_numpy()).tolist()
+
+
+def query_acidosis_subjects(
+    client: bigquery.Client,
+    lactate_items: Iterable[int],
+    ph_items: Iterable[int],
+    min_duration: timedelta = timedelta(minutes=120),
+    cache_table: str | None = None,
+) -> List[int]:
+    """Identify acidosis subjects entirely inside BigQuery.
+
+    This is the server‑side counterpart of :func:`fetch_lab_events`,
+    :func:`fetch_vasoactive_drugs` and :func:`identify_acidosis_episodes`.
+    Runs of abnormal values are delimited with ``LAG`` and a running
+    ``SUM`` over each subject's measurements, ordered by ``charttime`` and
+    then ``labevent_id``; each abnormal run is closed by the start of the
+    following run, and the resulting episodes are joined against ``emar``.
+    Only the matching subject identifiers are downloaded, instead of every
+    lactate and pH reading.  The rule mirrors
+    :func:`identify_acidosis_episodes` and must be kept in sync with it.
+
+    ``cache_table`` has the same meaning as in :func:`fetch_lab_events` and
+    shares its cached lab events; ``emar`` is always read directly.
+    """
+    lactate_items = frozenset(lactate_items)
+    ph_items = frozenset(ph_items)
+    items = sorted(int(i) for i in lactate_items | ph_items)
+    source = _lab_events_source(client, items, cache_table)
+    query = f"""
+        WITH labs AS (
+            SELECT
+                le.subject_id,
+                le.labevent_id,
+                le.charttime,
+                (le.itemid IN UNNEST(@lactate_items) AND le.valuenum > @lactate_threshold)
+                    OR (le.itemid IN UNNEST(@ph_items) AND le.valuenum <= @ph_threshold)
+                    AS is_abnormal
+            FROM {source} le
+            WHERE le.itemid IN UNNEST(@items)
+              AND le.valuenum IS NOT NULL
+        ),
+        -- Lactate and pH from one blood gas share a charttime, so both
+        -- windows break ties on labevent_id to see the rows in one order.
+        flagged AS (
+            SELECT
+                subject_id,
+                labevent_id,
+                charttime,
+                is_abnormal,
+                IF(is_abnormal = LAG(is_abnormal) OVER w, 0, 1) AS is_run_start
+            FROM labs
+            WINDOW w AS (PARTITION BY subject_id ORDER BY charttime, labevent_id)
+        ),
+        numbered AS (
+            SELECT
+                subject_id,
+                charttime,
+                is_abnormal,
+                SUM(is_run_start) OVER (
+                    w ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+                ) AS run_id
+            FROM flagged
+            WINDOW w AS (PARTITION BY subject_id ORDER BY charttime, labevent_id)
+        ),
+        runs AS (
+            SELECT
+                subject_id,
+                run_id,
+                LOGICAL_AND(is_abnormal) AS is_abnormal,
+                MIN(charttime) AS start_time
+            FROM numbered
+            GROUP BY subject_id, run_id
+        ),
+        episodes AS (
+            SELECT
+                subject_id,
+                is_abnormal,
+                start_time,
+                LEAD(start_time) OVER (
+                    PARTITION BY subject_id ORDER BY run_id
+                ) AS end_time
+            FROM runs
+        )
+        SELECT DISTINCT ep.subject_id
+        FROM episodes ep
+        JOIN `physionet-data.mimiciv_hosp.emar` em
+          ON em.subject_id = ep.subject_id
+         AND em.scheduletime > ep.start_time
+         AND em.scheduletime < ep.end_time
+        WHERE ep.is_abnormal
+          AND DATETIME_DIFF(ep.end_time, ep.start_time, SECOND) >= @min_seconds
+          AND LOWER(em.medication) IN UNNEST(@meds)
+        ORDER BY ep.subject_id
+    """
+    job_config = _query_config([
+        bigquery.ArrayQueryParameter('lactate_items', 'INT64', sorted(int(i) for i in lactate_items)),
+        bigquery.ArrayQueryParameter('ph_items', 'INT64', sorted(int(i) for i in ph_items)),
+        bigquery.ArrayQueryParameter('items', 'INT64', items),
+        bigquery.ScalarQueryParameter('lactate_threshold', 'FLOAT64', LACTATE_THRESHOLD),
+        bigquery.ScalarQueryParameter('ph_threshold', 'FLOAT64', PH_THRESHOLD),
+        bigquery.ArrayQueryParameter('meds', 'STRING', VASOACTIVE_MEDICATIONS),
+        bigquery.ScalarQueryParameter('min_seconds', 'INT64', int(min_duration.total_seconds())),
+    ])
+    return run_query(client, query, job_config)['subject_id'].tolist()
 
 
 def evaluate_against_diagnosis(
@@ -189,18 +655,19 @@ def evaluate_against_diagnosis(
     """
     if not subjects:
         return pd.DataFrame(columns=['subject_id', 'has_code'])
-    subj_str = ",".join(str(s) for s in set(subjects))
-    diag_query = f"""
-        SELECT subject_id, icd_code
+    subject_ids = sorted(int(s) for s in set(subjects))
+    diag_query = """
+        SELECT DISTINCT subject_id
         FROM `physionet-data.mimiciv_hosp.diagnoses_icd`
-        WHERE subject_id IN ({subj_str}) AND icd_code LIKE '{icd_code}'
+        WHERE subject_id IN UNNEST(@subjects) AND icd_code LIKE @icd_code
     """
-    diag_df = run_query(client, diag_query)
-    diag_df['has_code'] = True
-    all_df = pd.DataFrame({'subject_id': list(set(subjects))})
-    result = all_df.merge(diag_df[['subject_id', 'has_code']], how='left', on='subject_id')
-    result['has_code'].fillna(False, inplace=True)
-    return result
+    job_config = _query_config([
+        bigquery.ArrayQueryParameter('subjects', 'INT64', subject_ids),
+        bigquery.ScalarQueryParameter('icd_code', 'STRING', icd_code),
+    ])
+    diag_df = run_query(client, diag_query, job_config)
+    has_code = np.isin(subject_ids, diag_df['subject_id'].to_numpy())
+    return pd.DataFrame({'subject_id': subject_ids, 'has_code': has_code})
 
 
 def main() -> None:  # pragma: no cover
@@ -210,7 +677,9 @@ def main() -> None:  # pragma: no cover
     ``GOOGLE_CLOUD_PROJECT`` environment variable, queries the necessary
     tables, identifies episodes, and prints a summary of how many
     subjects were flagged and how many carried an ICD‑10 code for lactic
-    acidosis.
+    acidosis.  If ``ACIDOSIS_CACHE_DATASET`` names a writable
+    ``project.dataset``, the lab events and vasoactive drug records are
+    cached there between runs.
     """
     if bigquery is None:
         raise SystemExit(
@@ -223,10 +692,17 @@ def main() -> None:  # pragma: no cover
             "The environment variable GOOGLE_CLOUD_PROJECT must be set to your GCP project ID."
         )
     client = bigquery.Client(project=project_id)
+    cache_dataset = os.environ.get('ACIDOSIS_CACHE_DATASET')
+    labs_cache = f'{cache_dataset}.acidosis_labs' if cache_dataset else None
+    drugs_cache = f'{cache_dataset}.acidosis_vasoactive_drugs' if cache_dataset else None
 
-    lactate_items, ph_items = get_lactate_ph_items(client)
-    lab_events = fetch_lab_events(client, lactate_items, ph_items)
-    drugs = fetch_vasoactive_drugs(client)
+    # The drug query does not depend on the lab item identifiers, so it runs
+    # in the background while the items are resolved and the labs fetched.
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        drugs_future = pool.submit(fetch_vasoactive_drugs, client, drugs_cache)
+        lactate_items, ph_items = get_lactate_ph_items(client)
+        lab_events = fetch_lab_events(client, lactate_items, ph_items, labs_cache)
+        drugs = drugs_future.result()
     subjects = identify_acidosis_episodes(lab_events, drugs, lactate_items, ph_items)
     results = evaluate_against_diagnosis(client, subjects, 'E872')
     total_subjects = len(results)